@@ -1,20 +1,85 @@
 import io
+import os
 import streamlit as st
 from datetime import datetime
 from script_based_generation import _build_bytes_for_year
 from util.ai_worker3 import controller
+from util.job_runner import JobRunner
+from util.rate_limiter import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, get_scheduler
+
+AI_MODEL = "gpt-5-mini"
+POLL_SECONDS = 1.0
+# Speculative prefetch is opt-in; the budget caps speculative AI jobs started per session.
+SPECULATIVE_DEFAULT = os.getenv("SPECULATIVE_PREFETCH", "0") == "1"
+SPECULATIVE_AI_DEFAULT = os.getenv("SPECULATIVE_AI", "0") == "1"
+SPECULATIVE_AI_BUDGET = int(os.getenv("SPECULATIVE_AI_BUDGET", "3"))
 
 st.set_page_config(page_title="FY Text Generator", layout="centered")
 
+
+# One runner per server process, shared by all sessions (dedup + result reuse).
+# A running speculative job that gets promoted has its rate-limit ticket (keyed by year/model,
+# which the runner keeps unique among in-flight jobs) raised to interactive priority.
+@st.cache_resource
+def get_job_runner():
+    return JobRunner(
+        lambda year, model, report, speculative: controller(
+            year, model=model, progress=report,
+            priority=lambda: PRIORITY_BACKGROUND if speculative() else PRIORITY_INTERACTIVE,
+            rate_key=(year, model),
+        ),
+        on_promote=lambda job: get_scheduler().reprioritize((job.year, job.model), PRIORITY_INTERACTIVE),
+    )
+
+
+# Deterministic file, cached so a prefetched year is served instantly on "Submit".
+@st.cache_data
+def build_file(year):
+    return _build_bytes_for_year(year)
+
+
+# Selection changed: build the file ahead of the click and, if enabled, start the AI job at
+# background priority. The speculative job this session started before is cancelled if it
+# has not started yet.
+def prefetch_selected_year():
+    if not st.session_state.get("speculate"):
+        return
+    year = st.session_state["selected_year"]
+    build_file(year)
+    if not st.session_state.get("speculate_ai"):
+        return
+    runner = get_job_runner()
+    previous = st.session_state.pop("speculative_job_id", None)
+    if previous is not None:
+        runner.cancel(previous)
+    used = st.session_state.get("speculative_ai_used", 0)
+    if used < SPECULATIVE_AI_BUDGET:
+        job_id, created = runner.submit(year, AI_MODEL, speculative=True)
+        # Joining a job that already exists (in flight, done, or another session's) costs nothing
+        # from the budget, and is not ours to cancel later.
+        if created:
+            st.session_state["speculative_job_id"] = job_id
+            st.session_state["speculative_ai_used"] = used + 1
+
+
 st.title("Financial Year TXT Generator")
 
 # Dropdown: 2024 → 2030
 years = list(range(2024, 2031))
-selected_year = st.selectbox("Select Financial Year", years, index=0)
+selected_year = st.selectbox("Select Financial Year", years, index=0, key="selected_year",
+                             on_change=prefetch_selected_year)
+
+with st.sidebar:
+    st.checkbox("Speculative prefetch", value=SPECULATIVE_DEFAULT, key="speculate",
+                on_change=prefetch_selected_year,
+                help="Build the file as soon as the year changes, before you click Submit.")
+    st.checkbox("Also start AI generation", value=SPECULATIVE_AI_DEFAULT, key="speculate_ai",
+                on_change=prefetch_selected_year, disabled=not st.session_state.get("speculate"),
+                help=f"Uses up to {SPECULATIVE_AI_BUDGET} background AI runs per session.")
 
 # Submit
 if st.button("Submit"):
-    file_bytes = _build_bytes_for_year(selected_year)
+    file_bytes = build_file(selected_year)
     filename = f"financial_year_{selected_year}.txt"
     st.success(f"Generated file for FY {selected_year}.")
     st.download_button(
@@ -23,15 +88,40 @@ if st.button("Submit"):
         file_name=filename,
         mime="text/plain",
     )
-    
+
 if st.button("Submit to AI"):
-    file_bytes = controller(selected_year)
-    filename = f"financial_year_{selected_year}_AI_Gen.txt"
-    st.success(f"Generated file for FY {selected_year}.")
+    st.session_state["ai_job_id"], _ = get_job_runner().submit(selected_year, AI_MODEL)
+
+
+# AI job panel: polls the background job while it is pending, then offers the download.
+def show_ai_job(job_id, polling):
+    runner = get_job_runner()
+    job = runner.status(job_id)
+    if job is None:
+        st.warning("The AI job has expired, please submit again.")
+        return
+    if job.pending:
+        st.progress(job.progress, text=f"FY {job.year} (AI): {job.stage}...")
+        return
+    if polling:
+        # Finished since the last poll: rerun the page once so polling stops.
+        st.rerun()
+    if job.error:
+        st.error(f"AI generation failed for FY {job.year}: {job.error}")
+        return
+    filename = f"financial_year_{job.year}_AI_Gen.txt"
+    st.success(f"Generated file for FY {job.year}.")
     st.download_button(
         label="Download TXT",
-        data=file_bytes,
+        data=runner.result(job_id),
         file_name=filename,
         mime="text/plain",
+        key="download_ai",
     )
 
+
+job_id = st.session_state.get("ai_job_id")
+if job_id is not None:
+    job = get_job_runner().status(job_id)
+    polling = job is not None and job.pending
+    st.fragment(show_ai_job, run_every=POLL_SECONDS if polling else None)(job_id, polling)
@@ -5,7 +5,6 @@ from pathlib import Path
 
 def get_first_date_of_financial_year(year):
     d = date(year - 1, 12, 31)          # Dec 31 of previous year
-    print(d.weekday())
     offset = (d.weekday() - 3) % 7      # Thursday = 3 (Mon=0..Sun=6)
     return d - timedelta(days=offset)
 
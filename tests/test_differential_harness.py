@@ -0,0 +1,19 @@
+import pytest
+
+from script_based_generation import _build_bytes_for_year
+from util.cycle_templates import build_bytes_for_year
+from util.differential_harness import compare_year, run_harness
+
+
+@pytest.mark.parametrize("engine", [_build_bytes_for_year, build_bytes_for_year],
+                         ids=["script_based_generation", "cycle_templates"])
+def test_engine_matches_reference(engine):
+    divergence = run_harness(engine)
+    assert divergence is None, divergence.describe()
+
+
+def test_truncated_output_reports_eof():
+    divergence = compare_year(lambda year: _build_bytes_for_year(year)[:-1], 2024)
+    assert divergence.actual_bytes == "<EOF>"
+    assert divergence.expected_bytes == repr(b"\n")
+    assert divergence.describe().count(divergence.expected) == 1
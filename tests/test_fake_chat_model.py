@@ -0,0 +1,24 @@
+import json
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import HumanMessage
+
+from util.fake_chat_model import RecordReplayChatModel, prompt_key
+
+
+def test_concurrent_recorders_keep_each_others_entries(tmp_path):
+    cassette = str(tmp_path / "cassette.json")
+    first = RecordReplayChatModel(cassette_path=cassette, mode="record",
+                                  inner=FakeListChatModel(responses=["one"]))
+    second = RecordReplayChatModel(cassette_path=cassette, mode="record",
+                                   inner=FakeListChatModel(responses=["two"]))
+    first.invoke([HumanMessage("first prompt")])
+    second.invoke([HumanMessage("second prompt")])
+
+    entries = json.loads((tmp_path / "cassette.json").read_text())["entries"]
+    assert {k: v["completion"] for k, v in entries.items()} == {
+        prompt_key([HumanMessage("first prompt")]): "one",
+        prompt_key([HumanMessage("second prompt")]): "two",
+    }
+    replay = RecordReplayChatModel(cassette_path=cassette)
+    assert replay.invoke([HumanMessage("first prompt")]).content == "one"
@@ -0,0 +1,33 @@
+import threading
+
+from util.job_runner import DONE, JobRunner
+from util.rate_limiter import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, RequestScheduler, SimulatedClock
+
+
+def test_promotion_before_acquire_queues_at_interactive_priority():
+    clock = SimulatedClock()
+    scheduler = RequestScheduler(60, 1_000_000, clock=clock.time, sleep=clock.sleep)
+    started, promoted = threading.Event(), threading.Event()
+    priorities = []
+
+    def priority_of(speculative):
+        value = PRIORITY_BACKGROUND if speculative() else PRIORITY_INTERACTIVE
+        priorities.append(value)
+        return value
+
+    def worker(year, model, report, speculative):
+        started.set()
+        promoted.wait(5)   # promoted while running, before reaching the rate limiter
+        scheduler.acquire(1, priority=lambda: priority_of(speculative), key=(year, model))
+        return b"file"
+
+    runner = JobRunner(worker, on_promote=lambda job: scheduler.reprioritize((job.year, job.model),
+                                                                           PRIORITY_INTERACTIVE))
+    job_id, created = runner.submit(2025, "m", speculative=True)
+    assert created
+    started.wait(5)
+    assert runner.submit(2025, "m") == (job_id, False)
+    promoted.set()
+    runner._speculative_executor.shutdown(wait=True)
+    assert runner.status(job_id).status == DONE
+    assert priorities == [PRIORITY_INTERACTIVE]
@@ -0,0 +1,115 @@
+import threading
+import time
+
+from util.rate_limiter import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, RequestScheduler, SimulatedClock
+
+
+class GatedClock(SimulatedClock):
+    # sleep() blocks until the gate opens, so a test can line up waiters behind the queue head.
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+        self.sleepers = 0
+
+    def sleep(self, seconds: float) -> None:
+        with self._lock:
+            self.sleepers += 1
+        self.gate.wait(5)
+        super().sleep(seconds)
+
+
+def _wait_until(predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def _scheduler(clock: SimulatedClock, rpm: float = 60, tpm: float = 1_000_000) -> RequestScheduler:
+    return RequestScheduler(rpm, tpm, clock=clock.time, sleep=clock.sleep)
+
+
+def _record_grants(scheduler: RequestScheduler) -> list[int]:
+    # Token amounts in the order they are granted (take() runs under the scheduler's lock).
+    granted: list[int] = []
+    take = scheduler._tokens.take
+    scheduler._tokens.take = lambda amount, now: (granted.append(amount), take(amount, now))
+    return granted
+
+
+def _start(scheduler: RequestScheduler, tokens: int, priority: int, key=None) -> threading.Thread:
+    t = threading.Thread(target=scheduler.acquire, args=(tokens, priority, key))
+    t.start()
+    return t
+
+
+def test_requests_per_minute_pacing():
+    clock = SimulatedClock()
+    scheduler = _scheduler(clock, rpm=2)
+    waits = [scheduler.acquire(1) for _ in range(4)]
+    assert waits == [0, 0, 30, 30]
+    assert clock.time() == 60
+
+
+def test_tokens_per_minute_pacing():
+    clock = SimulatedClock()
+    scheduler = _scheduler(clock, tpm=600)
+    assert scheduler.acquire(600) == 0
+    assert scheduler.acquire(300) == 30
+    assert scheduler.metrics().tokens_granted == 900
+
+
+def test_interactive_is_served_before_earlier_background():
+    clock = GatedClock()
+    scheduler = _scheduler(clock, rpm=1)
+    granted = _record_grants(scheduler)
+    scheduler.acquire(100)
+    threads = [_start(scheduler, 1, PRIORITY_BACKGROUND)]
+    _wait_until(lambda: clock.sleepers == 1)
+    threads.append(_start(scheduler, 2, PRIORITY_BACKGROUND))
+    _wait_until(lambda: scheduler.metrics().queue_depth == 2)
+    threads.append(_start(scheduler, 3, PRIORITY_INTERACTIVE))
+    _wait_until(lambda: scheduler.metrics().queue_depth == 3)
+    clock.gate.set()
+    for t in threads:
+        t.join(5)
+    assert granted == [100, 3, 1, 2]
+
+
+def test_reprioritize_moves_waiting_request_ahead():
+    clock = GatedClock()
+    scheduler = _scheduler(clock, rpm=1)
+    granted = _record_grants(scheduler)
+    scheduler.acquire(100)
+    threads = [_start(scheduler, 1, PRIORITY_BACKGROUND)]
+    _wait_until(lambda: clock.sleepers == 1)
+    threads.append(_start(scheduler, 2, PRIORITY_BACKGROUND, key="promoted"))
+    _wait_until(lambda: scheduler.metrics().queue_depth == 2)
+    threads.append(_start(scheduler, 4, PRIORITY_BACKGROUND))
+    _wait_until(lambda: scheduler.metrics().queue_depth == 3)
+
+    assert not scheduler.reprioritize("missing", PRIORITY_INTERACTIVE)
+    assert not scheduler.reprioritize("promoted", PRIORITY_BACKGROUND + 1)
+    assert scheduler.reprioritize("promoted", PRIORITY_INTERACTIVE)
+    clock.gate.set()
+    for t in threads:
+        t.join(5)
+    assert granted == [100, 2, 1, 4]
+    assert not scheduler.reprioritize("promoted", PRIORITY_INTERACTIVE)
+
+
+def test_callable_priority_is_read_when_queued():
+    clock = GatedClock()
+    scheduler = _scheduler(clock, rpm=1)
+    granted = _record_grants(scheduler)
+    scheduler.acquire(100)
+    promoted = {"flag": False}
+    threads = [_start(scheduler, 1, PRIORITY_BACKGROUND)]
+    _wait_until(lambda: clock.sleepers == 1)
+    promoted["flag"] = True
+    threads.append(_start(scheduler, 2, lambda: PRIORITY_INTERACTIVE if promoted["flag"] else PRIORITY_BACKGROUND))
+    _wait_until(lambda: scheduler.metrics().queue_depth == 2)
+    clock.gate.set()
+    for t in threads:
+        t.join(5)
+    assert granted == [100, 2, 1]
@@ -2,7 +2,6 @@ import os
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
 from datetime import date, timedelta
 
 from pydantic import BaseModel, Field
@@ -47,6 +46,8 @@ class PromptStructure(BaseModel):
     example: Optional[str] = Field(None, description="Supporting example either on how to achieve the objective or how the output looks like after applying the rules.")
 
 # Supporiting function for building the final prompt.
+# Sections that are the same for every year come first (a stable prefix the provider can cache);
+# objective and input carry the year's dates and come last.
 def build_prompt(builder: PromptStructure):
     template = """
     You are a professional schedule file generator, your task is to create a file content which consist of dates and other information, 
@@ -56,12 +57,6 @@ def build_prompt(builder: PromptStructure):
     Topic:
     {topic}
     
-    Objective:
-    {objective}
-    
-    Input:
-    {input}
-    
     Output:
     {output}
     
@@ -73,6 +68,12 @@ def build_prompt(builder: PromptStructure):
     
     Example: (Keep the examples in mind)
     {example}
+    
+    Objective:
+    {objective}
+    
+    Input:
+    {input}
     """
     
     return PromptTemplate.from_template(template=template).partial(
@@ -153,7 +154,7 @@ def chain_llm_with_prompt(year):
     prompt_strt = prompt_structure_builder(year)
     prompt_template = build_prompt(prompt_strt)
     llm = get_llm_instance()
-    chain = prompt_template | llm | StrOutputParser()
+    chain = prompt_template | llm
     first_date = get_first_date_of_financial_year(year)
     last_date = get_second_last_date_of_financial_year(year)
     supporting_vars = {
@@ -163,8 +164,12 @@ def chain_llm_with_prompt(year):
         "last_date": last_date        
     }
     # print("The chain is", chain)
-    text = chain.invoke(supporting_vars)
-    print(text)
+    message = chain.invoke(supporting_vars)
+    print(message.content)
+    # Cached prompt tokens for this call (reported by the provider when prefix caching applies)
+    usage = message.usage_metadata or {}
+    cached = (usage.get("input_token_details") or {}).get("cache_read", 0)
+    print(f"Prompt cache: {cached}/{usage.get('input_tokens', 0)} prompt tokens cached")
     pass
 
 def file_generator():
@@ -2,7 +2,6 @@ import os
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
 from datetime import date, timedelta
 
 from pydantic import BaseModel, Field
@@ -53,37 +52,39 @@ class PromptStructure(BaseModel):
     contextHints: Optional[str] = None            # context + validator hints merged
 
 # Supporiting function for building the final prompt.
+# Sections that are the same for every year come first (a stable prefix the provider can cache);
+# topic, objective and constants carry the year and come last.
 def build_prompt(builder: PromptStructure):
     template = """
         You are a professional schedule file generator. Create a file consisting of dates and other information.
         Produce ONLY the final lines—no commentary.
 
-        Topic:
-        {topic}
-
-        Objective:
-        {objective}
-
-        Input:
-        {input}
-
         Output (includes hard constraints):
         {output}
 
         Example (format intuition; DO NOT copy content):
         {example}
 
-        Rules & Algorithm (MUST follow exactly):
+        Rules & Algorithm (MUST follow exactly; year, first_date and last_date are given under Constants):
         {rulesAlgorithm}
 
         Rendering Contract (80 chars per line; field-by-field spec):
         {renderingContract}
 
-        Constants (DO NOT alter):
-        {constants}
-
         Context Hints (domain specifics + common error traps to avoid):
         {contextHints}
+
+        Input:
+        {input}
+
+        Topic:
+        {topic}
+
+        Objective:
+        {objective}
+
+        Constants (DO NOT alter):
+        {constants}
         """
     
     return PromptTemplate.from_template(template).partial(
@@ -140,18 +141,18 @@ def prompt_structure_builder(year: int):
     )
 
     # === KEY FIXES: make fin-month mapping and A/L boundaries unambiguous ===
-    rulesAlgorithm = f"""
+    rulesAlgorithm = """
     1) Build the Thursday list:
-    - Start at first_date = {first_date}; end at last_date = {last_date}; step +7 days (inclusive).
+    - Start at first_date; end at last_date; step +7 days (inclusive).
 
     2) For each current_date:
     - prev_date = current_date - 7 days
     - week_number = 1-based index (zero-pad: 01, 02, ...)
     - financial month (2-digit) MUST use this lookup (DO NOT infer from calendar month):
-        if (current_date.year == {year}-1 and month == 12): "01"
-        elif (current_date.year == {year} and month == 1):  "01"
-        elif (current_date.year == {year} and 2 <= month <= 11): f"{{month:02d}}"  # 02..11
-        elif (current_date.year == {year} and month == 12): "12"
+        if (current_date.year == year-1 and month == 12): "01"
+        elif (current_date.year == year and month == 1):  "01"
+        elif (current_date.year == year and 2 <= month <= 11): f"{month:02d}"  # 02..11
+        elif (current_date.year == year and month == 12): "12"
         else:  ERROR (should not occur)
     - A/L flags apply ONLY at financial-month group boundaries:
         * First row of a financial-month group -> "Axx" (xx = that group's fin-month)
@@ -167,9 +168,9 @@ def prompt_structure_builder(year: int):
     - prev_jul := day-of-year(prev_date) formatted 3 digits (001..366)
     - cur_jul  := day-of-year(current_date) formatted 3 digits (001..366)
 
-    5) Golden boundary checks (MUST be true for year {year}):
-    - The very first line (for {first_date}) MUST have flag "A01" and fin_month "01".
-    - The very last line (for {last_date})  MUST have flag "L12" and fin_month "12".
+    5) Golden boundary checks (MUST be true for the given year):
+    - The very first line (for first_date) MUST have flag "A01" and fin_month "01".
+    - The very last line (for last_date)  MUST have flag "L12" and fin_month "12".
     """
 
     renderingContract = """
@@ -234,7 +235,7 @@ def chain_llm_with_prompt(year):
     prompt_strt = prompt_structure_builder(year)
     prompt_template = build_prompt(prompt_strt)
     llm = get_llm_instance()
-    chain = prompt_template | llm | StrOutputParser()
+    chain = prompt_template | llm
     first_date = get_first_date_of_financial_year(year)
     last_date = get_second_last_date_of_financial_year(year)
     supporting_vars = {
@@ -244,8 +245,13 @@ def chain_llm_with_prompt(year):
         "last_date": last_date        
     }
     # print("The chain is", chain)
-    text = chain.invoke(supporting_vars)
+    message = chain.invoke(supporting_vars)
+    text = message.content
     print(text)
+    # Cached prompt tokens for this call (reported by the provider when prefix caching applies)
+    usage = message.usage_metadata or {}
+    cached = (usage.get("input_token_details") or {}).get("cache_read", 0)
+    print(f"Prompt cache: {cached}/{usage.get('input_tokens', 0)} prompt tokens cached")
     
     out_path = Path(f"financial_year_{year}_output.txt")
     out_path.write_text(text, encoding="utf-8")
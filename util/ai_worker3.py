@@ -5,21 +5,27 @@ from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from datetime import date, timedelta
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
 from typing import Optional, List
 from pathlib import Path
-import json
+import re
+import threading
+import time
+
+from util.fake_chat_model import model_from_env
+from util.rate_limiter import get_scheduler, estimate_tokens, DEFAULT_COMPLETION_TOKENS, PRIORITY_INTERACTIVE
 
 load_dotenv()
 OPENAI_KEY =  os.getenv("OPENAI_API_KEY")
 
 def get_llm_instance(model = "gpt-4o-mini", temperature = 0.5):
-    llm = ChatOpenAI(
+    # LLM_CASSETTE switches to the record/replay model (offline runs and benchmarks).
+    llm = model_from_env(lambda: ChatOpenAI(
     model=model,
     api_key=OPENAI_KEY,
     temperature=temperature,
     streaming=False,
-    )
+    ))
     return llm
 
 def get_first_date_of_financial_year(year):
@@ -53,6 +59,32 @@ class RowData(BaseModel):
     financialYearMonth: int = 0
 
 
+# Validates the whole model response (a JSON array of rows) in one pass.
+rows_adapter = TypeAdapter(list[RowData])
+
+# Counters for the tolerant decoding stage: every repair here is a model round trip saved.
+repair_metrics = {
+    "responses": 0,          # responses decoded
+    "repaired": 0,           # responses that needed at least one local repair
+    "markdown_fence": 0,
+    "surrounding_prose": 0,
+    "python_literal": 0,
+    "trailing_comma": 0,
+}
+# JobRunner calls the pipeline from several threads at once.
+_metrics_lock = threading.Lock()
+
+# Prompt-cache usage over all calls: input tokens the provider served from its prefix cache.
+prompt_cache_metrics = {
+    "calls": 0,
+    "prompt_tokens": 0,
+    "cached_prompt_tokens": 0,
+    "model_seconds": 0.0,
+}
+
+_FENCE_RE = re.compile(r"^\s*```[a-zA-Z]*\s*\n(.*?)\n?\s*```\s*$", re.DOTALL)
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
 
 # Pydantic Model for Prompt
 class PromptStructure(BaseModel):
@@ -68,33 +100,35 @@ class PromptStructure(BaseModel):
 
 
 # Supporiting function for building the final prompt.
+# Everything that is the same for every year comes first, so the provider's prompt cache can
+# reuse that prefix across calls; the per-year sections (topic, objective, constants) come last.
 def build_prompt(builder: PromptStructure):
     template = """
     You are a meticulous schedule generator.
 
-    Topic:
-    {topic}
-
-    Objective:
-    {objective}
-
-    Input:
-    {input}
-
     Output (JSON-only, UTF-8 safe, no markdown fences, no prose):
     {output}
 
     Example (shape intuition; do NOT copy values):
     {example}
 
-    Rules & Algorithm (MUST follow exactly):
+    Rules & Algorithm (MUST follow exactly; year, first_date and last_date are given under Constants):
     {rulesAlgorithm}
 
-    Constants (DO NOT alter):
-    {constants}
-
     Context Hints:
     {contextHints}
+
+    Input:
+    {input}
+
+    Topic:
+    {topic}
+
+    Objective:
+    {objective}
+
+    Constants (DO NOT alter):
+    {constants}
     """
     return PromptTemplate.from_template(template).partial(
         topic=builder.topic or "",
@@ -166,15 +200,15 @@ def prompt_structure_builder(year: int):
     ]
     """.strip()
 
-    rulesAlgorithm = f"""
-    1) Thursdays list: start at first_date = {first_date}; end at last_date = {last_date}; step +7 days (inclusive).
+    rulesAlgorithm = """
+    1) Thursdays list: start at first_date; end at last_date; step +7 days (inclusive).
     2) For each current_date:
     - prev_date = current_date - 7 days
     - week = sequential 1-based index, zero-padded "WW"
     - financialYearMonth (int):
-        * Dec({year-1}) -> 1 ; Jan({year}) -> 1
-        * Feb..Nov({year}) -> 2..11
-        * Dec({year}) -> 12
+        * Dec(year-1) -> 1 ; Jan(year) -> 1
+        * Feb..Nov(year) -> 2..11
+        * Dec(year) -> 12
     - isFirstWeekOfMonth / isLastWeekOfMonth:
         * TRUE only at financial-month boundaries: first row of group => isFirstWeekOfMonth=True; last row => isLastWeekOfMonth=True.
         * Interior rows both False.
@@ -256,28 +290,145 @@ def get_file_utf(rows: RowData):
     return lst_str
 
 
-
-# Transformation function: return a langchain
-def chain_llm_with_prompt(year: int):
-    # Get the instance of prompt structure
-    prompt_strt = prompt_structure_builder(year)
-    # Generate the prompt as blob text
-    prompt_template = build_prompt(prompt_strt)
-    # Get LLM instance
-    llm = get_llm_instance(model="gpt-5-mini")
-    chain = prompt_template | llm | StrOutputParser()
+# Rewrite bare Python literals and drop trailing commas, leaving string contents untouched.
+def _repair_outside_strings(text: str, repairs: list[str]) -> str:
+    out: List[str] = []
+    i, n = 0, len(text)
+    in_string = False
+    while i < n:
+        ch = text[i]
+        if in_string:
+            out.append(ch)
+            if ch == "\\" and i + 1 < n:
+                out.append(text[i + 1])
+                i += 1
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+            out.append(ch)
+        elif ch.isalpha():
+            j = i
+            while j < n and (text[j].isalnum() or text[j] == "_"):
+                j += 1
+            word = text[i:j]
+            if word in _PYTHON_LITERALS:
+                word = _PYTHON_LITERALS[word]
+                repairs.append("python_literal")
+            out.append(word)
+            i = j
+            continue
+        elif ch == ",":
+            j = i + 1
+            while j < n and text[j].isspace():
+                j += 1
+            if j < n and text[j] in "]}":
+                repairs.append("trailing_comma")
+            else:
+                out.append(ch)
+        else:
+            out.append(ch)
+        i += 1
+    return "".join(out)
+
+
+# Fix the common syntactic noise in model output locally instead of paying for a new call.
+def repair_json_text(text: str) -> tuple[str, list[str]]:
+    repairs: list[str] = []
+    fenced = _FENCE_RE.match(text)
+    if fenced:
+        text = fenced.group(1)
+        repairs.append("markdown_fence")
+    start, end = text.find("["), text.rfind("]")
+    if start != -1 and end > start and (text[:start].strip() or text[end + 1:].strip()):
+        text = text[start:end + 1]
+        repairs.append("surrounding_prose")
+    text = _repair_outside_strings(text, repairs)
+    return text, repairs
+
+
+def _is_syntax_error(err: ValidationError) -> bool:
+    return any(e["type"] == "json_invalid" for e in err.errors())
+
+
+# Decode the model response into rows: strict single-pass validation first, local repair on syntax errors.
+def parse_rows(text: str) -> list[RowData]:
+    with _metrics_lock:
+        repair_metrics["responses"] += 1
+    try:
+        return rows_adapter.validate_json(text)
+    except ValidationError as err:
+        # Schema errors (wrong keys/types) are not something a text repair can fix.
+        if not _is_syntax_error(err):
+            raise
+    repaired, repairs = repair_json_text(text)
+    rows = rows_adapter.validate_json(repaired)
+    with _metrics_lock:
+        repair_metrics["repaired"] += 1
+        # Each kind counts once per response, however many places it was applied.
+        for kind in set(repairs):
+            repair_metrics[kind] += 1
+    return rows
+
+
+# Report how much of the prompt was served from the provider's cache for one model call.
+def record_prompt_cache_usage(year: int, model: str, message, seconds: float) -> int:
+    usage = message.usage_metadata or {}
+    prompt_tokens = usage.get("input_tokens", 0)
+    cached = (usage.get("input_token_details") or {}).get("cache_read", 0)
+    with _metrics_lock:
+        prompt_cache_metrics["calls"] += 1
+        prompt_cache_metrics["prompt_tokens"] += prompt_tokens
+        prompt_cache_metrics["cached_prompt_tokens"] += cached
+        prompt_cache_metrics["model_seconds"] += seconds
+    if prompt_tokens:
+        print(f"Prompt cache: FY {year} ({model}) {cached}/{prompt_tokens} prompt tokens cached, "
+              f"model call {seconds:.2f}s")
+    return cached
+
+
+# Variables passed along with the prompt when invoking the chain
+def build_supporting_vars(year: int):
     first_date = get_first_date_of_financial_year(year)
     last_date = get_second_last_date_of_financial_year(year)
-    supporting_vars = {
+    return {
         "year": year,
         "months_with_indentation": months_with_indentation,
         "first_date": first_date,
         "last_date": last_date        
     }
+
+
+# Transformation function: return a langchain
+def chain_llm_with_prompt(year: int, model: str = "gpt-5-mini", progress=None, priority=PRIORITY_INTERACTIVE,
+                          rate_key=None):
+    # progress(stage, fraction) is optional, used by background jobs to report where they are
+    report = progress or (lambda stage, fraction: None)
+    # Get the instance of prompt structure
+    report("building prompt", 0.05)
+    prompt_strt = prompt_structure_builder(year)
+    # Generate the prompt as blob text
+    prompt_template = build_prompt(prompt_strt)
+    # Get LLM instance
+    llm = get_llm_instance(model=model)
+    # Keep the AIMessage (not just the text) so its usage metadata can be reported
+    chain = prompt_template | llm
+    supporting_vars = build_supporting_vars(year)
     # print("The chain is", chain)
-    text = chain.invoke(supporting_vars)
-    rows_json = json.loads(text)
-    rows: list[RowData] = [RowData(**d) for d in rows_json]
+    # Reserve prompt + expected completion tokens with the shared rate limiter before calling the API.
+    report("queued for rate limit", 0.08)
+    prompt_tokens = estimate_tokens(prompt_template.format(**supporting_vars))
+    # priority may be a callable read when the request is queued; rate_key lets the caller raise
+    # it while the request waits (see RequestScheduler.reprioritize).
+    get_scheduler().acquire(prompt_tokens + DEFAULT_COMPLETION_TOKENS, priority=priority, key=rate_key)
+    report("waiting for model", 0.1)
+    started = time.perf_counter()
+    message = chain.invoke(supporting_vars)
+    record_prompt_cache_usage(year, model, message, time.perf_counter() - started)
+    text = StrOutputParser().invoke(message)
+    report("validating rows", 0.9)
+    rows: list[RowData] = parse_rows(text)
+    report("rendering file", 0.95)
     text = "\n".join(get_file_utf(rows))
     return text
 
@@ -286,6 +437,6 @@ def file_generator(year, text):
     out_path.write_text(text, encoding="utf-8")
     print(f"\n File saved successfully: {out_path.resolve()}")
 
-def controller(year):
-    text = chain_llm_with_prompt(year)
+def controller(year, model="gpt-5-mini", progress=None, priority=PRIORITY_INTERACTIVE, rate_key=None):
+    text = chain_llm_with_prompt(year, model=model, progress=progress, priority=priority, rate_key=rate_key)
     return text.encode("utf-8")
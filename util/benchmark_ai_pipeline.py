@@ -0,0 +1,149 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+from pydantic import BaseModel
+
+# The benchmark measures our own pipeline, not the shared rate limiter budget.
+os.environ.setdefault("OPENAI_REQUESTS_PER_MINUTE", "1000000")
+os.environ.setdefault("OPENAI_TOKENS_PER_MINUTE", "1000000000")
+
+from script_based_generation import row_data_for_file, _build_bytes_for_year
+from util import ai_worker3
+from util.fake_chat_model import prompt_key, save_cassette
+
+DEFAULT_YEARS = list(range(2024, 2031))
+
+# name -> environment for model_from_env. Latency/chunk timing are kept small so the suite
+# stays quick; raise them to model a real provider.
+SCENARIOS: dict[str, dict[str, str]] = {
+    "clean": {},
+    "latency_50ms": {"LLM_REPLAY_LATENCY": "0.05"},
+    "streaming": {"LLM_REPLAY_LATENCY": "0.02", "LLM_REPLAY_CHUNK_DELAY": "0.0005"},
+    "noisy_json": {"LLM_REPLAY_FAULTS": "noisy_json=1"},
+    "faults_mixed": {"LLM_REPLAY_FAULTS": "noisy_json=0.3,truncated_json=0.1,wrong_rows=0.1,timeout=0.05"},
+}
+
+
+# Result of one scenario.
+class BenchResult(BaseModel):
+    scenario: str
+    calls: int
+    ok: int
+    errors: int
+    mismatches: int
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    repaired: int
+
+
+def reference_completion(year: int) -> str:
+    # What a perfect model answer looks like for ai_worker3's prompt (RowData JSON array).
+    rows = []
+    for row in row_data_for_file(year):
+        rows.append({
+            "month": f"{row.month:02d}",
+            "day": row.day,
+            "year": row.year,
+            "prev_month": f"{row.prev_month:02d}",
+            "prev_day": row.prev_day,
+            "prev_year": row.prev_year,
+            "week": row.week,
+            "prevJulday": row.prevJulday,
+            "curJulday": row.curJulday,
+            "isFirstWeekOfMonth": row.isFirstWeekOfMonth,
+            "isLastWeekOfMonth": row.isLastWeekOfMonth,
+            "financialYearMonth": row.financialYearMonth,
+        })
+    return json.dumps(rows, indent=1)
+
+
+def build_reference_cassette(path: str, years: list[int]) -> None:
+    # Key each completion by the exact prompt ai_worker3 sends for that year.
+    entries = {}
+    for year in years:
+        prompt = ai_worker3.build_prompt(ai_worker3.prompt_structure_builder(year))
+        messages = prompt.format_prompt(**ai_worker3.build_supporting_vars(year)).to_messages()
+        entries[prompt_key(messages)] = {"completion": reference_completion(year), "year": year}
+    save_cassette(path, entries)
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run_scenario(name: str, env: dict[str, str], cassette: str, years: list[int],
+                 repeats: int) -> BenchResult:
+    saved = {k: os.environ.get(k) for k in list(env) + ["LLM_CASSETTE"]}
+    os.environ.update(env, LLM_CASSETTE=cassette)
+    repaired_before = ai_worker3.repair_metrics["repaired"]
+    timings, ok, errors, mismatches = [], 0, 0, 0
+    try:
+        for _ in range(repeats):
+            for year in years:
+                expected = _build_bytes_for_year(year).rstrip(b"\n")
+                t0 = time.perf_counter()
+                try:
+                    actual = ai_worker3.controller(year)
+                except Exception:
+                    errors += 1
+                    continue
+                finally:
+                    timings.append(time.perf_counter() - t0)
+                if actual == expected:
+                    ok += 1
+                else:
+                    mismatches += 1
+    finally:
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+    ms = [t * 1000 for t in timings]
+    return BenchResult(
+        scenario=name,
+        calls=len(timings),
+        ok=ok,
+        errors=errors,
+        mismatches=mismatches,
+        mean_ms=statistics.fmean(ms),
+        p50_ms=_percentile(ms, 50),
+        p95_ms=_percentile(ms, 95),
+        repaired=ai_worker3.repair_metrics["repaired"] - repaired_before,
+    )
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmark of the ai_worker3 controller path.")
+    parser.add_argument("--years", type=int, nargs="*", default=DEFAULT_YEARS)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="run only these scenarios (default: all)")
+    parser.add_argument("--cassette", help="replay this cassette instead of the generated reference one")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cassette = args.cassette
+        if cassette is None:
+            cassette = str(Path(tmp) / "reference_cassette.json")
+            build_reference_cassette(cassette, args.years)
+        print(f"{'scenario':<14}{'calls':>6}{'ok':>6}{'err':>6}{'diff':>6}{'repair':>8}"
+              f"{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+        for name in args.scenario or SCENARIOS:
+            r = run_scenario(name, SCENARIOS[name], cassette, args.years, args.repeats)
+            print(f"{r.scenario:<14}{r.calls:>6}{r.ok:>6}{r.errors:>6}{r.mismatches:>6}{r.repaired:>8}"
+                  f"{r.mean_ms:>10.2f}{r.p50_ms:>10.2f}{r.p95_ms:>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
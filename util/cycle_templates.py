@@ -0,0 +1,123 @@
+import argparse
+import random
+import sys
+import time
+from functools import lru_cache
+from typing import Optional
+
+from script_based_generation import _build_bytes_for_year
+
+# The Gregorian calendar repeats every 400 years (146,097 days = 20,871 whole weeks): the
+# Thursdays, week counts, Julian days and A/L flags of FY Y and FY Y+400 differ only in the
+# year digits. One canonical cycle of rendered files is kept as templates and any other year
+# is produced by substituting its year digits into the template of the same cycle position.
+CYCLE_YEARS = 400
+CYCLE_START = 2000
+
+# Templates only work while every year field is 4 digits wide, like in the canonical cycle.
+# Outside this range (year - 1 < 1000) the reference renderer is used.
+MIN_TEMPLATE_YEAR = 1001
+MAX_TEMPLATE_YEAR = 9999
+
+# (start, end) of the year fields in each rendered line; see get_file_utf.
+YEAR_FIELDS = ((13, 17), (48, 52), (55, 59), (64, 68), (72, 76))
+
+# Placeholders for the digits of the fiscal year (bytes 0-3) and of the year before it (bytes 4-7).
+# Control bytes never occur in rendered text, so filling a template is a single bytes.translate
+# pass with those eight bytes mapped to the real digits.
+_CURRENT = bytes([0, 1, 2, 3])
+_PREVIOUS = bytes([4, 5, 6, 7])
+_IDENTITY = bytes(range(256))
+
+
+def canonical_year(year: int) -> int:
+    return CYCLE_START + (year - CYCLE_START) % CYCLE_YEARS
+
+
+@lru_cache(maxsize=CYCLE_YEARS)
+def template_for(canonical: int) -> bytes:
+    # Rendered file of a canonical year with its year fields replaced by placeholders.
+    current, previous = str(canonical).encode(), str(canonical - 1).encode()
+    lines = []
+    for line in _build_bytes_for_year(canonical).split(b"\n")[:-1]:
+        parts, pos = [], 0
+        for start, end in YEAR_FIELDS:
+            field = line[start:end]
+            if field == current:
+                placeholder = _CURRENT
+            elif field == previous:
+                placeholder = _PREVIOUS
+            else:
+                raise ValueError(f"Unexpected year field {field!r} in FY {canonical} template")
+            parts += [line[pos:start], placeholder]
+            pos = end
+        parts.append(line[pos:])
+        lines.append(b"".join(parts))
+    return b"\n".join(lines) + b"\n"
+
+
+def warm_cycle() -> None:
+    # Build all 400 templates up front (otherwise they are built on first use).
+    for canonical in range(CYCLE_START, CYCLE_START + CYCLE_YEARS):
+        template_for(canonical)
+
+
+def build_bytes_for_year(year: int) -> bytes:
+    """Same bytes as script_based_generation._build_bytes_for_year, from the cycle templates."""
+    if not MIN_TEMPLATE_YEAR <= year <= MAX_TEMPLATE_YEAR:
+        return _build_bytes_for_year(year)
+    table = b"%04d%04d" % (year, year - 1) + _IDENTITY[8:]
+    return template_for(canonical_year(year)).translate(table)
+
+
+def benchmark(samples: int = 20_000, seed: int = 0) -> dict[str, float]:
+    """Microseconds per year: reference renderer, cycle templates, and a plain copy of the template."""
+    rng = random.Random(seed)
+    years = [rng.randint(MIN_TEMPLATE_YEAR, MAX_TEMPLATE_YEAR) for _ in range(samples)]
+    t0 = time.perf_counter()
+    warm_cycle()
+    warm_seconds = time.perf_counter() - t0
+
+    reference_years = years[: max(1, samples // 50)]
+    t0 = time.perf_counter()
+    for year in reference_years:
+        _build_bytes_for_year(year)
+    reference_us = (time.perf_counter() - t0) / len(reference_years) * 1e6
+
+    t0 = time.perf_counter()
+    for year in years:
+        build_bytes_for_year(year)
+    template_us = (time.perf_counter() - t0) / len(years) * 1e6
+
+    templates = [template_for(canonical_year(year)) for year in years]
+    t0 = time.perf_counter()
+    for template in templates:
+        bytearray(template)
+    copy_us = (time.perf_counter() - t0) / len(templates) * 1e6
+
+    return {
+        "warm_cycle_ms": warm_seconds * 1000,
+        "reference_us": reference_us,
+        "template_us": template_us,
+        "copy_us": copy_us,
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark 400-year cycle templates against the reference renderer.")
+    parser.add_argument("--samples", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    r = benchmark(args.samples, args.seed)
+    print(f"Built {CYCLE_YEARS} templates in {r['warm_cycle_ms']:.0f} ms")
+    print(f"Random FY {MIN_TEMPLATE_YEAR}-{MAX_TEMPLATE_YEAR}, per year:")
+    print(f"  reference (row_data_for_file + get_file_utf): {r['reference_us']:8.2f} us")
+    print(f"  cycle template:                               {r['template_us']:8.2f} us "
+          f"({r['reference_us'] / r['template_us']:.0f}x faster)")
+    print(f"  plain copy of the template (memcpy baseline): {r['copy_us']:8.2f} us")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
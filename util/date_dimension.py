@@ -0,0 +1,111 @@
+import argparse
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+
+from script_based_generation import row_data_for_file
+
+TABLE = "fiscal_date_dim"
+BATCH_ROWS = 10_000
+
+# One row per calendar day. A fiscal week row (a Thursday from row_data_for_file) covers that
+# Thursday and the following six days; consecutive financial years tile the calendar with no gaps.
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS {TABLE} (
+    date_key              INTEGER PRIMARY KEY,  -- YYYYMMDD
+    calendar_date         TEXT    NOT NULL,     -- ISO yyyy-mm-dd
+    day_of_week           INTEGER NOT NULL,     -- Mon=0..Sun=6
+    fiscal_year           INTEGER NOT NULL,
+    fiscal_week           INTEGER NOT NULL,
+    week_start_date       TEXT    NOT NULL,     -- the fiscal week's Thursday
+    week_julday           INTEGER NOT NULL,     -- curJulday of that Thursday
+    financial_month       INTEGER NOT NULL,
+    al_flag               TEXT    NOT NULL,     -- 'A', 'L' or '' as in the text file
+    is_first_week_of_month INTEGER NOT NULL,
+    is_last_week_of_month  INTEGER NOT NULL
+)
+"""
+
+INDEXES = [
+    f"CREATE UNIQUE INDEX IF NOT EXISTS ix_{TABLE}_calendar_date ON {TABLE} (calendar_date)",
+    f"CREATE INDEX IF NOT EXISTS ix_{TABLE}_fiscal_week ON {TABLE} (fiscal_year, fiscal_week)",
+    f"CREATE INDEX IF NOT EXISTS ix_{TABLE}_financial_month ON {TABLE} (fiscal_year, financial_month)",
+]
+
+INSERT = f"INSERT INTO {TABLE} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+
+def daily_rows(fiscal_year: int) -> Iterator[tuple]:
+    for row in row_data_for_file(fiscal_year):
+        week_start = date(int(row.year), row.month, int(row.day))
+        al_flag = "A" if row.isFirstWeekOfMonth else "L" if row.isLastWeekOfMonth else ""
+        week_values = (
+            fiscal_year,
+            int(row.week),
+            week_start.isoformat(),
+            int(row.curJulday),
+            row.financialYearMonth,
+            al_flag,
+            int(row.isFirstWeekOfMonth),
+            int(row.isLastWeekOfMonth),
+        )
+        for offset in range(7):
+            d = week_start + timedelta(days=offset)
+            yield (d.year * 10000 + d.month * 100 + d.day, d.isoformat(), d.weekday()) + week_values
+
+
+def loaded_years(conn: sqlite3.Connection) -> set[int]:
+    return {y for (y,) in conn.execute(f"SELECT DISTINCT fiscal_year FROM {TABLE}")}
+
+
+def _batches(rows: Iterable[tuple], size: int) -> Iterator[list[tuple]]:
+    it = iter(rows)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+def load_years(conn: sqlite3.Connection, years: Iterable[int], batch_rows: int = BATCH_ROWS) -> int:
+    """Add the given financial years to the dimension; years already loaded are skipped.
+
+    Everything is inserted in one transaction with batched executemany, so an interrupted
+    load leaves the table as it was. Returns the number of days inserted.
+    """
+    conn.execute(SCHEMA)
+    new_years = sorted(set(years) - loaded_years(conn))
+    inserted = 0
+    with conn:
+        for batch in _batches((r for y in new_years for r in daily_rows(y)), batch_rows):
+            conn.executemany(INSERT, batch)
+            inserted += len(batch)
+        for statement in INDEXES:
+            conn.execute(statement)
+    return inserted
+
+
+def build_date_dimension(path: str, start: int, end: int) -> int:
+    conn = sqlite3.connect(path)
+    try:
+        return load_years(conn, range(start, end + 1))
+    finally:
+        conn.close()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build or extend the SQLite fiscal date dimension.")
+    parser.add_argument("database", help="SQLite file, created if missing")
+    parser.add_argument("--start", type=int, default=1950)
+    parser.add_argument("--end", type=int, default=2050, help="inclusive")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    inserted = build_date_dimension(args.database, args.start, args.end)
+    print(f"Inserted {inserted} days for FY {args.start}-{args.end} into {args.database}:{TABLE} "
+          f"in {time.perf_counter() - t0:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+import argparse
+import importlib
+import random
+import sys
+import time
+from functools import lru_cache
+from typing import Callable, Iterable, Optional
+
+from pydantic import BaseModel
+
+from script_based_generation import row_data_for_file, get_file_utf
+
+# An engine takes a financial year and returns the full file content as bytes,
+# i.e. the same contract as script_based_generation._build_bytes_for_year.
+Engine = Callable[[int], bytes]
+
+# Wide sweep used on every run: covers 53-week years, leap / non-leap centuries
+# (1600, 1700, 2000, 2100, ...) and the previous-December first week.
+DEFAULT_YEARS = range(1600, 2601)
+
+# Bounds accepted by datetime for the reference (year - 1 and year + 1 week must exist).
+MIN_YEAR = 2
+MAX_YEAR = 9999
+
+
+# Pydantic model describing the first mismatch between reference and candidate.
+class Divergence(BaseModel):
+    year: int
+    offset: int
+    line: int
+    column: int
+    expected: str         # line containing the offset
+    actual: str
+    expected_bytes: str   # repr of the bytes from the offset on, or <EOF>
+    actual_bytes: str
+
+    def describe(self) -> str:
+        head = (
+            f"FY {self.year}: first diverging byte at offset {self.offset} "
+            f"(line {self.line}, column {self.column})\n"
+            f"  bytes:    expected {self.expected_bytes} vs actual {self.actual_bytes}\n"
+        )
+        # Truncated or extended output: the line itself reads the same on both sides.
+        if self.expected == self.actual:
+            return head + f"  line:     {self.expected!r}"
+        return head + f"  expected: {self.expected!r}\n  actual:   {self.actual!r}"
+
+
+@lru_cache(maxsize=None)
+def reference_bytes(year: int) -> bytes:
+    # Reference output: today's row_data_for_file + get_file_utf, rendered the same
+    # way _build_bytes_for_year does it.
+    rows = row_data_for_file(year)
+    lst_str = get_file_utf(rows)
+    return ("\n".join(lst_str) + "\n").encode("utf-8")
+
+
+def first_diverging_offset(expected: bytes, actual: bytes) -> Optional[int]:
+    if expected == actual:
+        return None
+    n = min(len(expected), len(actual))
+    # Narrow down by halves on the common prefix, bytes comparison does the work.
+    lo, hi = 0, n
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if expected[lo:mid + 1] == actual[lo:mid + 1]:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _line_at(buf: bytes, offset: int) -> str:
+    offset = min(offset, len(buf))
+    start = buf.rfind(b"\n", 0, offset) + 1
+    end = buf.find(b"\n", offset)
+    return buf[start:end if end != -1 else len(buf)].decode("utf-8", "replace")
+
+
+def _bytes_at(buf: bytes, offset: int, width: int = 8) -> str:
+    return repr(buf[offset:offset + width]) if offset < len(buf) else "<EOF>"
+
+
+def compare_year(engine: Engine, year: int) -> Optional[Divergence]:
+    expected = reference_bytes(year)
+    actual = engine(year)
+    offset = first_diverging_offset(expected, actual)
+    if offset is None:
+        return None
+    line = expected.count(b"\n", 0, offset) + 1
+    column = offset - (expected.rfind(b"\n", 0, offset) + 1) + 1
+    return Divergence(
+        year=year,
+        offset=offset,
+        line=line,
+        column=column,
+        expected=_line_at(expected, offset),
+        actual=_line_at(actual, offset),
+        expected_bytes=_bytes_at(expected, offset),
+        actual_bytes=_bytes_at(actual, offset),
+    )
+
+
+def random_windows(seed: int, count: int, max_width: int = 8) -> list[int]:
+    # Property-style sampling: contiguous runs of years anywhere in the valid range,
+    # so year-to-year transitions are exercised and not only isolated years.
+    rng = random.Random(seed)
+    years: list[int] = []
+    for _ in range(count):
+        width = rng.randint(1, max_width)
+        start = rng.randint(MIN_YEAR, MAX_YEAR - width + 1)
+        years.extend(range(start, start + width))
+    return years
+
+
+def compare_years(engine: Engine, years: Iterable[int]) -> Optional[Divergence]:
+    for year in years:
+        divergence = compare_year(engine, year)
+        if divergence is not None:
+            return divergence
+    return None
+
+
+def run_harness(engine: Engine, years: Iterable[int] = DEFAULT_YEARS,
+                windows: int = 50, seed: int = 0) -> Optional[Divergence]:
+    divergence = compare_years(engine, years)
+    if divergence is None and windows:
+        divergence = compare_years(engine, random_windows(seed, windows))
+    return divergence
+
+
+def load_engine(spec: str) -> Engine:
+    # "module:function", e.g. "script_based_generation:_build_bytes_for_year"
+    module_name, _, attr = spec.partition(":")
+    if not attr:
+        raise ValueError(f"Engine must be given as 'module:function', got {spec!r}")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Compare a week-ahead engine byte-for-byte against row_data_for_file + get_file_utf."
+    )
+    parser.add_argument("engine", nargs="*", default=["script_based_generation:_build_bytes_for_year"],
+                        help="engine(s) as module:function returning the file bytes for a year")
+    parser.add_argument("--start", type=int, default=DEFAULT_YEARS.start)
+    parser.add_argument("--end", type=int, default=DEFAULT_YEARS.stop - 1, help="inclusive")
+    parser.add_argument("--windows", type=int, default=50, help="random year windows to sample")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    failed = False
+    for spec in args.engine:
+        engine = load_engine(spec)
+        t0 = time.perf_counter()
+        divergence = run_harness(engine, range(args.start, args.end + 1), args.windows, args.seed)
+        elapsed = time.perf_counter() - t0
+        if divergence is None:
+            print(f"OK   {spec}: years {args.start}-{args.end} + {args.windows} random windows "
+                  f"(seed {args.seed}) in {elapsed:.2f}s")
+        else:
+            failed = True
+            print(f"FAIL {spec}: {divergence.describe()}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+import argparse
+import gzip
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+from pydantic import BaseModel
+
+from script_based_generation import row_data_for_file, _build_bytes_for_year
+
+# Optional dependencies: pyarrow for Parquet/Arrow, zstandard for .zst text.
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depends on the environment
+    pa = None
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+# Column name -> Arrow type name, in RowData field order (plus the fiscal year the row belongs to).
+COLUMNS = {
+    "fiscal_year": "int16",
+    "month": "int8",
+    "day": "int8",
+    "year": "int16",
+    "prev_month": "int8",
+    "prev_day": "int8",
+    "prev_year": "int16",
+    "week": "int8",
+    "prevJulday": "int16",
+    "curJulday": "int16",
+    "isFirstWeekOfMonth": "bool_",
+    "isLastWeekOfMonth": "bool_",
+    "financialYearMonth": "int8",
+}
+
+DEFAULT_BATCH_YEARS = 50
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Parquet/Arrow export needs pyarrow: pip install pyarrow")
+
+
+def _require_zstandard():
+    if zstandard is None:
+        raise ImportError("zstd export needs zstandard: pip install zstandard")
+
+
+def columns_for_years(years) -> dict[str, list]:
+    cols: dict[str, list] = {name: [] for name in COLUMNS}
+    for fiscal_year in years:
+        for row in row_data_for_file(fiscal_year):
+            cols["fiscal_year"].append(fiscal_year)
+            cols["month"].append(row.month)
+            cols["day"].append(int(row.day))
+            cols["year"].append(int(row.year))
+            cols["prev_month"].append(row.prev_month)
+            cols["prev_day"].append(int(row.prev_day))
+            cols["prev_year"].append(int(row.prev_year))
+            cols["week"].append(int(row.week))
+            cols["prevJulday"].append(int(row.prevJulday))
+            cols["curJulday"].append(int(row.curJulday))
+            cols["isFirstWeekOfMonth"].append(row.isFirstWeekOfMonth)
+            cols["isLastWeekOfMonth"].append(row.isLastWeekOfMonth)
+            cols["financialYearMonth"].append(row.financialYearMonth)
+    return cols
+
+
+def iter_column_batches(years, batch_years: int = DEFAULT_BATCH_YEARS) -> Iterator[dict[str, list]]:
+    years = list(years)
+    for start in range(0, len(years), batch_years):
+        yield columns_for_years(years[start:start + batch_years])
+
+
+def arrow_schema():
+    _require_pyarrow()
+    return pa.schema([(name, getattr(pa, type_name)()) for name, type_name in COLUMNS.items()])
+
+
+def _record_batches(years, batch_years: int):
+    schema = arrow_schema()
+    for cols in iter_column_batches(years, batch_years):
+        yield pa.RecordBatch.from_pydict(cols, schema=schema)
+
+
+def write_parquet(path, years, batch_years: int = DEFAULT_BATCH_YEARS, compression: str = "zstd") -> Path:
+    # One row group per batch of years, written as it is built.
+    schema = arrow_schema()
+    with pq.ParquetWriter(str(path), schema, compression=compression) as writer:
+        for batch in _record_batches(years, batch_years):
+            writer.write_batch(batch)
+    return Path(path)
+
+
+def write_arrow_ipc(path, years, batch_years: int = DEFAULT_BATCH_YEARS, compression: str = "zstd") -> Path:
+    # Arrow IPC file (Feather v2), record batches written as they are built.
+    schema = arrow_schema()
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+    with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_file(sink, schema, options=options) as writer:
+        for batch in _record_batches(years, batch_years):
+            writer.write_batch(batch)
+    return Path(path)
+
+
+def write_compressed_text(path, years, codec: str = "gzip", level: Optional[int] = None) -> Path:
+    # Same bytes as the plain text file, one year at a time into the compressed stream.
+    if codec == "gzip":
+        stream = gzip.open(path, "wb", compresslevel=level or 6)
+    elif codec == "zstd":
+        _require_zstandard()
+        stream = zstandard.ZstdCompressor(level=level or 3).stream_writer(open(path, "wb"), closefd=True)
+    else:
+        raise ValueError(f"Unknown codec {codec!r}, expected 'gzip' or 'zstd'")
+    with stream:
+        for year in years:
+            stream.write(_build_bytes_for_year(year))
+    return Path(path)
+
+
+def write_text(path, years) -> Path:
+    with open(path, "wb") as f:
+        for year in years:
+            f.write(_build_bytes_for_year(year))
+    return Path(path)
+
+
+def parse_text_columns(data: bytes) -> dict[str, list]:
+    # What a downstream loader has to do with the 80-column text: slice every field back out.
+    cols: dict[str, list] = {name: [] for name in COLUMNS if name != "fiscal_year"}
+    for line in data.decode("utf-8").splitlines():
+        flag = line[23]
+        cols["month"].append(int(line[76:78]))
+        cols["day"].append(int(line[78:80]))
+        cols["year"].append(int(line[72:76]))
+        cols["prev_month"].append(int(line[68:70]))
+        cols["prev_day"].append(int(line[70:72]))
+        cols["prev_year"].append(int(line[64:68]))
+        cols["week"].append(int(line[19:21]))
+        cols["prevJulday"].append(int(line[52:55]))
+        cols["curJulday"].append(int(line[59:62]))
+        cols["isFirstWeekOfMonth"].append(flag == "A")
+        cols["isLastWeekOfMonth"].append(flag == "L")
+        cols["financialYearMonth"].append(int(line[24:26]))
+    return cols
+
+
+def _read_zstd(path) -> bytes:
+    with open(path, "rb") as f, zstandard.ZstdDecompressor().stream_reader(f) as reader:
+        return reader.read()
+
+
+# Size and load time of one export format.
+class FormatReport(BaseModel):
+    name: str
+    bytes: int
+    write_seconds: float
+    load_seconds: float
+    rows: int
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - t0
+
+
+def compare_formats(years, out_dir) -> list[FormatReport]:
+    years = list(years)
+    out_dir = Path(out_dir)
+    reports: list[FormatReport] = []
+
+    def add(name, path, write, load):
+        _, write_seconds = _timed(lambda: write(path))
+        rows, load_seconds = _timed(lambda: load(path))
+        reports.append(FormatReport(name=name, bytes=path.stat().st_size, write_seconds=write_seconds,
+                                    load_seconds=load_seconds, rows=rows))
+
+    # Every loader ends with the same dict of Python column lists, so load times compare like for like.
+    rows = lambda cols: len(cols["week"])
+    add("text", out_dir / "weekahead.txt", lambda p: write_text(p, years),
+        lambda p: rows(parse_text_columns(p.read_bytes())))
+    add("text.gz", out_dir / "weekahead.txt.gz", lambda p: write_compressed_text(p, years, "gzip"),
+        lambda p: rows(parse_text_columns(gzip.decompress(p.read_bytes()))))
+    if zstandard is not None:
+        add("text.zst", out_dir / "weekahead.txt.zst", lambda p: write_compressed_text(p, years, "zstd"),
+            lambda p: rows(parse_text_columns(_read_zstd(p))))
+    if pa is not None:
+        add("parquet", out_dir / "weekahead.parquet", lambda p: write_parquet(p, years),
+            lambda p: rows(pq.read_table(p).to_pydict()))
+        add("arrow", out_dir / "weekahead.arrow", lambda p: write_arrow_ipc(p, years),
+            lambda p: rows(feather.read_table(p).to_pydict()))
+    return reports
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Export week-ahead rows as Parquet/Arrow/compressed text.")
+    parser.add_argument("--start", type=int, default=1900)
+    parser.add_argument("--end", type=int, default=2100, help="inclusive")
+    parser.add_argument("--format", choices=["parquet", "arrow", "gzip", "zstd", "compare"], default="compare")
+    parser.add_argument("--out", help="output file (or directory for compare)")
+    args = parser.parse_args(argv)
+    years = range(args.start, args.end + 1)
+
+    if args.format != "compare":
+        if not args.out:
+            parser.error("--out is required when exporting")
+        writers = {
+            "parquet": write_parquet,
+            "arrow": write_arrow_ipc,
+            "gzip": lambda p, y: write_compressed_text(p, y, "gzip"),
+            "zstd": lambda p, y: write_compressed_text(p, y, "zstd"),
+        }
+        path = writers[args.format](args.out, years)
+        print(f"Saved FY {args.start}-{args.end} to {Path(path).resolve()}")
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        reports = compare_formats(years, args.out or tmp)
+    text = reports[0]
+    print(f"FY {args.start}-{args.end}, {text.rows} rows")
+    print(f"{'format':<10}{'bytes':>12}{'vs text':>9}{'write ms':>10}{'load ms':>10}{'vs text':>9}")
+    for r in reports:
+        print(f"{r.name:<10}{r.bytes:>12}{r.bytes / text.bytes:>8.2f}x{r.write_seconds * 1000:>10.1f}"
+              f"{r.load_seconds * 1000:>10.1f}{r.load_seconds / text.load_seconds:>8.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
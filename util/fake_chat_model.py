@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import Field, PrivateAttr
+
+# Fault kinds that can be injected into replayed completions.
+FAULT_NOISY_JSON = "noisy_json"          # fences / Python literals / trailing commas (locally repairable)
+FAULT_TRUNCATED_JSON = "truncated_json"  # completion cut off mid-array (not repairable)
+FAULT_TIMEOUT = "timeout"                # sleeps for timeout_seconds then raises TimeoutError
+FAULT_WRONG_ROWS = "wrong_rows"          # valid JSON, but a row dropped and a day shifted
+FAULTS = (FAULT_NOISY_JSON, FAULT_TRUNCATED_JSON, FAULT_TIMEOUT, FAULT_WRONG_ROWS)
+
+_cassette_lock = threading.Lock()
+_cassette_cache: dict[str, tuple[int, dict[str, dict]]] = {}
+# One fault RNG per seed for the whole process: get_llm_instance creates a model per call,
+# and a per-instance RNG would make the same fault decision on every call.
+_fault_rngs: dict[int, random.Random] = {}
+
+
+def prompt_key(messages: list[BaseMessage]) -> str:
+    # Completions are looked up by the exact prompt, so a changed prompt needs re-recording.
+    text = "\n".join(f"{m.type}:{m.content}" for m in messages)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def load_cassette(path: str) -> dict[str, dict]:
+    # get_llm_instance builds a model per call, so parsed cassettes are cached until the file changes.
+    p = Path(path)
+    if not p.exists():
+        return {}
+    mtime = p.stat().st_mtime_ns
+    with _cassette_lock:
+        cached = _cassette_cache.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, json.loads(p.read_text(encoding="utf-8"))["entries"])
+            _cassette_cache[path] = cached
+        return dict(cached[1])
+
+
+def _write_cassette(path: str, entries: dict[str, dict]) -> None:
+    Path(path).write_text(json.dumps({"version": 1, "entries": entries}, indent=1), encoding="utf-8")
+
+
+def save_cassette(path: str, entries: dict[str, dict]) -> None:
+    with _cassette_lock:
+        _write_cassette(path, entries)
+
+
+def add_cassette_entry(path: str, key: str, entry: dict) -> None:
+    # Several models may record at once (one per call), so merge into what is on disk now
+    # instead of writing back a copy loaded when the model was built.
+    p = Path(path)
+    with _cassette_lock:
+        entries = json.loads(p.read_text(encoding="utf-8"))["entries"] if p.exists() else {}
+        entries[key] = entry
+        _write_cassette(path, entries)
+
+
+def _inject_fault(kind: str, completion: str) -> str:
+    if kind == FAULT_NOISY_JSON:
+        noisy = completion.replace("true", "True").replace("false", "False")
+        noisy = noisy.rstrip()[:-1].rstrip() + ",\n]"   # trailing comma before the closing bracket
+        return "Here is the JSON:\n```json\n" + noisy + "\n```"
+    if kind == FAULT_TRUNCATED_JSON:
+        return completion[: len(completion) // 2]
+    if kind == FAULT_WRONG_ROWS:
+        rows = json.loads(completion)
+        if len(rows) > 1:
+            rows.pop(len(rows) // 2)
+            rows[0]["day"] = f"{(int(rows[0]['day']) % 28) + 1:02d}"
+        return json.dumps(rows)
+    raise ValueError(f"Unknown fault kind {kind!r}")
+
+
+class RecordReplayChatModel(BaseChatModel):
+    """Chat model that replays stored completions, or records them from a real model.
+
+    In "replay" mode completions come from the cassette file (keyed by prompt), with
+    configurable latency, streaming chunk timing and injected faults. In "record" mode
+    every call goes to ``inner`` and the completion is added to the cassette.
+    """
+
+    cassette_path: str
+    mode: str = "replay"
+    inner: Optional[BaseChatModel] = None
+    latency_seconds: float = 0.0          # time before the first token
+    chunk_size: int = 64                  # characters per streamed chunk
+    chunk_delay_seconds: float = 0.0      # time between streamed chunks
+    streaming: bool = False
+    faults: dict[str, float] = Field(default_factory=dict)  # fault kind -> probability
+    timeout_seconds: float = 0.0
+    seed: int = 0
+
+    _entries: dict[str, dict] = PrivateAttr(default_factory=dict)
+
+    def model_post_init(self, __context: Any) -> None:
+        for kind in self.faults:
+            if kind not in FAULTS:
+                raise ValueError(f"Unknown fault kind {kind!r}, expected one of {FAULTS}")
+        if self.mode not in ("replay", "record"):
+            raise ValueError(f"mode must be 'replay' or 'record', got {self.mode!r}")
+        if self.mode == "record" and self.inner is None:
+            raise ValueError("record mode needs an inner model to record from")
+        self._entries = load_cassette(self.cassette_path)
+
+    @property
+    def _llm_type(self) -> str:
+        return "record-replay"
+
+    def _completion(self, messages: list[BaseMessage]) -> tuple[str, dict]:
+        key = prompt_key(messages)
+        if self.mode == "record":
+            message = self.inner.invoke(messages)
+            entry = {"completion": message.content, "usage_metadata": message.usage_metadata}
+            self._entries[key] = entry
+            add_cassette_entry(self.cassette_path, key, entry)
+        else:
+            entry = self._entries.get(key)
+            if entry is None:
+                raise KeyError(f"No recorded completion for prompt {key[:12]} in {self.cassette_path}")
+        completion = entry["completion"]
+        with _cassette_lock:
+            rng = _fault_rngs.setdefault(self.seed, random.Random(self.seed))
+            hits = [kind for kind, probability in self.faults.items() if rng.random() < probability]
+        for kind in hits:
+            if kind == FAULT_TIMEOUT:
+                time.sleep(self.timeout_seconds)
+                raise TimeoutError(f"Injected timeout after {self.timeout_seconds}s")
+            completion = _inject_fault(kind, completion)
+        return completion, entry.get("usage_metadata") or {}
+
+    def _generate(self, messages: list[BaseMessage], stop: Optional[list[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        completion, usage = self._completion(messages)
+        time.sleep(self.latency_seconds)
+        message = AIMessage(content=completion, usage_metadata=usage or None)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: list[BaseMessage], stop: Optional[list[str]] = None,
+                run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        completion, usage = self._completion(messages)
+        time.sleep(self.latency_seconds)
+        for start in range(0, len(completion), self.chunk_size):
+            if start:
+                time.sleep(self.chunk_delay_seconds)
+            piece = completion[start:start + self.chunk_size]
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+        if usage:
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage))
+
+
+def model_from_env(create_real: Callable[[], BaseChatModel]) -> BaseChatModel:
+    """Hook for get_llm_instance: LLM_CASSETTE switches to record/replay.
+
+    LLM_CASSETTE_MODE      replay (default, no API key needed) or record
+    LLM_REPLAY_LATENCY     seconds before the first token
+    LLM_REPLAY_CHUNK_DELAY seconds between streamed chunks (enables streaming when > 0)
+    LLM_REPLAY_FAULTS      e.g. "noisy_json=0.2,timeout=0.05"
+    LLM_REPLAY_TIMEOUT     seconds an injected timeout fault sleeps before raising
+    """
+    cassette = os.getenv("LLM_CASSETTE")
+    if not cassette:
+        return create_real()
+    mode = os.getenv("LLM_CASSETTE_MODE", "replay")
+    faults = {}
+    for item in filter(None, os.getenv("LLM_REPLAY_FAULTS", "").split(",")):
+        kind, _, probability = item.partition("=")
+        faults[kind.strip()] = float(probability or 1.0)
+    chunk_delay = float(os.getenv("LLM_REPLAY_CHUNK_DELAY", "0"))
+    return RecordReplayChatModel(
+        cassette_path=cassette,
+        mode=mode,
+        inner=create_real() if mode == "record" else None,
+        latency_seconds=float(os.getenv("LLM_REPLAY_LATENCY", "0")),
+        chunk_delay_seconds=chunk_delay,
+        streaming=chunk_delay > 0,
+        faults=faults,
+        timeout_seconds=float(os.getenv("LLM_REPLAY_TIMEOUT", "0")),
+    )
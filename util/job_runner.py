@@ -0,0 +1,169 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from pydantic import BaseModel
+
+# Job states, in the order a job goes through them.
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+# A worker gets (year, model, report, speculative) and returns the file bytes; report(stage, fraction)
+# lets it publish progress while it runs, speculative() tells whether the job should still run at
+# background priority (it turns False when the job is promoted, possibly while it runs).
+Worker = Callable[[int, str, Callable[[str, float], None], Callable[[], bool]], bytes]
+
+
+# Snapshot of a job handed to the UI (safe to read from any session).
+class JobInfo(BaseModel):
+    job_id: str
+    year: int
+    model: str
+    status: str = QUEUED
+    stage: str = "queued"
+    progress: float = 0.0
+    error: Optional[str] = None
+    speculative: bool = False
+    submitted_at: float = 0.0
+    finished_at: Optional[float] = None
+
+    @property
+    def pending(self) -> bool:
+        return self.status in (QUEUED, RUNNING)
+
+
+class _Job:
+    def __init__(self, year: int, model: str, speculative: bool):
+        self.info = JobInfo(job_id=uuid.uuid4().hex, year=year, model=model, speculative=speculative,
+                            submitted_at=time.time())
+        self.result: Optional[bytes] = None
+        self.future: Optional[Future] = None
+
+
+class JobRunner:
+    """Runs AI generations on a background thread pool, keyed by (year, model).
+
+    Concurrent submissions for the same key share one job, and completed results are
+    kept (up to ``max_results`` keys) so later submissions return immediately.
+    Speculative jobs run on their own small pool so they never hold up real requests;
+    they can be cancelled while queued, and a real submission for the same key promotes
+    a still-queued speculative job onto the main pool. Promoting one that already runs
+    calls ``on_promote`` with its info, so the worker's pending work can be re-prioritised.
+    """
+
+    def __init__(self, worker: Worker, max_workers: int = 4, max_results: int = 32,
+                 speculative_workers: int = 1, on_promote: Optional[Callable[[JobInfo], None]] = None):
+        self._worker = worker
+        self._on_promote = on_promote
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ai-job")
+        self._speculative_executor = ThreadPoolExecutor(max_workers=speculative_workers,
+                                                        thread_name_prefix="ai-speculative")
+        self._lock = threading.Lock()
+        self._jobs: dict[str, _Job] = {}
+        self._by_key: "OrderedDict[tuple[int, str], _Job]" = OrderedDict()
+        self._max_results = max_results
+
+    def submit(self, year: int, model: str, speculative: bool = False) -> tuple[str, bool]:
+        """Returns (job_id, created); created is False when an existing job was reused."""
+        key = (year, model)
+        with self._lock:
+            job = self._by_key.get(key)
+            # Reuse an in-flight or completed job; failed/cancelled ones are retried with a new job.
+            if job is not None and job.info.status not in (FAILED, CANCELLED):
+                self._by_key.move_to_end(key)
+                if not speculative and job.info.speculative:
+                    self._promote(job)
+                return job.info.job_id, False
+            if job is not None:
+                # The failed/cancelled job is replaced; its ID now reads as expired.
+                self._jobs.pop(job.info.job_id, None)
+            job = _Job(year, model, speculative)
+            self._jobs[job.info.job_id] = job
+            self._by_key[key] = job
+            self._evict()
+            self._start(job)
+        return job.info.job_id, True
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a speculative job that has not started yet; running or real jobs are left alone."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or not job.info.speculative or not job.future.cancel():
+                return False
+            job.info.status = CANCELLED
+            job.info.stage = "cancelled"
+            job.info.finished_at = time.time()
+            return True
+
+    def status(self, job_id: str) -> Optional[JobInfo]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.info.model_copy() if job else None
+
+    def result(self, job_id: str) -> Optional[bytes]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.result if job and job.info.status == DONE else None
+
+    def _start(self, job: _Job) -> None:
+        # Called with the lock held.
+        executor = self._speculative_executor if job.info.speculative else self._executor
+        job.future = executor.submit(self._run, job)
+
+    def _promote(self, job: _Job) -> None:
+        # Called with the lock held. A speculative job that already runs keeps running
+        # (its result is shared); one still queued moves to the main pool.
+        still_queued = job.future.cancel()
+        job.info.speculative = False
+        if still_queued:
+            self._start(job)
+        elif self._on_promote is not None:
+            self._on_promote(job.info.model_copy())
+
+    def _update(self, job: _Job, **fields) -> None:
+        with self._lock:
+            for name, value in fields.items():
+                setattr(job.info, name, value)
+
+    def _run(self, job: _Job) -> None:
+        with self._lock:
+            job.info.status = RUNNING
+            job.info.stage = "starting"
+
+        def report(stage: str, fraction: float) -> None:
+            self._update(job, stage=stage, progress=fraction)
+
+        def speculative() -> bool:
+            # No lock on purpose: the worker may call this while holding other locks (the rate
+            # limiter's), and _promote calls on_promote with our lock held. A bool read is atomic.
+            return job.info.speculative
+
+        try:
+            result = self._worker(job.info.year, job.info.model, report, speculative)
+        except Exception as exc:
+            self._update(job, status=FAILED, stage="failed", error=f"{type(exc).__name__}: {exc}",
+                         finished_at=time.time())
+            return
+        with self._lock:
+            job.result = result
+            job.info.status = DONE
+            job.info.stage = "done"
+            job.info.progress = 1.0
+            job.info.finished_at = time.time()
+
+    def _evict(self) -> None:
+        # Drop the oldest finished jobs once more than max_results keys are held.
+        # Called with the lock held; in-flight jobs are never evicted.
+        for key in list(self._by_key):
+            if len(self._by_key) <= self._max_results:
+                break
+            job = self._by_key[key]
+            if not job.info.pending:
+                del self._by_key[key]
+                self._jobs.pop(job.info.job_id, None)
@@ -0,0 +1,187 @@
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Optional
+
+from pydantic import BaseModel
+
+# The load test measures the app, not the shared OpenAI budget.
+os.environ.setdefault("OPENAI_REQUESTS_PER_MINUTE", "1000000")
+os.environ.setdefault("OPENAI_TOKENS_PER_MINUTE", "1000000000")
+
+from streamlit.testing.v1 import AppTest
+
+from util.benchmark_ai_pipeline import build_reference_cassette
+
+APP_FILE = str(Path(__file__).resolve().parent.parent / "main.py")
+YEARS = list(range(2024, 2031))
+SUBMIT = "Submit"
+SUBMIT_AI = "Submit to AI"
+
+# AppTest swaps a process-global mock Runtime in and out around every script run, so two runs
+# cannot overlap in one process. Each simulated session therefore gets its own process: page
+# runs and AI jobs of different sessions really run in parallel, but every session also has
+# its own JobRunner, caches and rate limiter (a real server shares them between sessions).
+_mp = multiprocessing.get_context("spawn")
+
+
+# Latency/throughput summary for one session count.
+class RoundResult(BaseModel):
+    sessions: int
+    requests: int
+    errors: int
+    seconds: float
+    throughput_rps: float
+    latency_ms: dict[str, dict[str, float]]   # action -> {p50, p95, p99}
+    memory_kb_per_session: float
+    peak_memory_kb: float
+
+
+# What one session process sends back.
+class SessionResult(BaseModel):
+    samples: dict[str, list[float]]
+    errors: int
+    memory_bytes: int
+    peak_memory_bytes: int
+
+
+def _percentiles(values: list[float]) -> dict[str, float]:
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+    ordered = sorted(values)
+    pick = lambda pct: ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+    return {"p50": pick(50), "p95": pick(95), "p99": pick(99)}
+
+
+def _button(at: AppTest, label: str):
+    return next(b for b in at.button if b.label == label)
+
+
+def _click_submit(at: AppTest, year: int) -> bool:
+    at.selectbox[0].select(year)
+    _button(at, SUBMIT).click()
+    at.run()
+    return not at.exception and any(f"FY {year}" in s.value for s in at.success)
+
+
+def _click_submit_ai(at: AppTest, year: int, poll_seconds: float, timeout: float) -> bool:
+    at.selectbox[0].select(year)
+    _button(at, SUBMIT_AI).click()
+    at.run()
+    deadline = time.perf_counter() + timeout
+    # AppTest does not run st.fragment(run_every=...), so rerun the page like the polling fragment
+    # would until the job has finished.
+    while not (at.success or at.error or at.exception):
+        if time.perf_counter() > deadline:
+            return False
+        time.sleep(poll_seconds)
+        at.run()
+    return not at.exception and not at.error and any(f"FY {year}" in s.value for s in at.success)
+
+
+def run_session(iterations: int, ai_ratio: float, seed: int, poll_seconds: float, timeout: float,
+                ready, start, results) -> None:
+    # Runs in its own process. The first page run (imports, Streamlit setup) happens before the
+    # round starts and before memory tracing, so neither is counted.
+    rng = random.Random(seed)
+    at = AppTest.from_file(APP_FILE, default_timeout=timeout)
+    at.run()
+    samples: dict[str, list[float]] = {SUBMIT: [], SUBMIT_AI: []}
+    errors = 0
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    ready.release()
+    start.wait()
+    for _ in range(iterations):
+        year = rng.choice(YEARS)
+        action = SUBMIT_AI if rng.random() < ai_ratio else SUBMIT
+        t0 = time.perf_counter()
+        try:
+            if action == SUBMIT:
+                ok = _click_submit(at, year)
+            else:
+                ok = _click_submit_ai(at, year, poll_seconds, timeout)
+        except Exception:
+            ok = False
+        samples[action].append((time.perf_counter() - t0) * 1000)
+        errors += not ok
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    results.put(SessionResult(samples=samples, errors=errors, memory_bytes=max(0, current - baseline),
+                              peak_memory_bytes=max(0, peak - baseline)).model_dump())
+
+
+def run_round(sessions: int, iterations: int, ai_ratio: float, seed: int,
+              poll_seconds: float, timeout: float) -> RoundResult:
+    # Every session starts cold in a fresh process; timing starts once all of them are ready.
+    ready, start, results = _mp.Semaphore(0), _mp.Event(), _mp.Queue()
+    processes = [
+        _mp.Process(target=run_session,
+                    args=(iterations, ai_ratio, seed + i, poll_seconds, timeout, ready, start, results))
+        for i in range(sessions)
+    ]
+    for p in processes:
+        p.start()
+    for _ in processes:
+        if not ready.acquire(timeout=timeout):
+            raise TimeoutError("a session process did not start in time")
+    t0 = time.perf_counter()
+    start.set()
+    session_results = [SessionResult(**results.get(timeout=timeout * iterations)) for _ in processes]
+    seconds = time.perf_counter() - t0
+    for p in processes:
+        p.join()
+    samples = {action: [v for r in session_results for v in r.samples[action]] for action in (SUBMIT, SUBMIT_AI)}
+    requests = sum(len(v) for v in samples.values())
+    return RoundResult(
+        sessions=sessions,
+        requests=requests,
+        errors=sum(r.errors for r in session_results),
+        seconds=seconds,
+        throughput_rps=requests / seconds if seconds else 0.0,
+        latency_ms={action: _percentiles(values) for action, values in samples.items()},
+        memory_kb_per_session=sum(r.memory_bytes for r in session_results) / 1024 / sessions,
+        peak_memory_kb=sum(r.peak_memory_bytes for r in session_results) / 1024,
+    )
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Simulate concurrent Streamlit sessions against main.py (AI path uses the replay model)."
+    )
+    parser.add_argument("--sessions", type=int, nargs="*", default=[1, 2, 4, 8])
+    parser.add_argument("--iterations", type=int, default=5, help="clicks per session")
+    parser.add_argument("--ai-ratio", type=float, default=0.5, help="share of clicks on 'Submit to AI'")
+    parser.add_argument("--model-latency", type=float, default=0.2, help="replayed model latency in seconds")
+    parser.add_argument("--poll", type=float, default=0.05, help="seconds between page reruns while an AI job runs")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cassette = str(Path(tmp) / "load_test_cassette.json")
+        build_reference_cassette(cassette, YEARS)
+        os.environ["LLM_CASSETTE"] = cassette
+        os.environ["LLM_REPLAY_LATENCY"] = str(args.model_latency)
+
+        print("Note: one process per session (AppTest allows one script run at a time per process); "
+              "sessions run in parallel but do not share the job runner, caches or rate limiter.")
+        print(f"{'sessions':>8}{'reqs':>6}{'err':>5}{'req/s':>8}"
+              f"{'submit p50/p95/p99 ms':>26}{'AI p50/p95/p99 ms':>26}{'KB/session':>12}{'peak KB':>10}")
+        for n in args.sessions:
+            r = run_round(n, args.iterations, args.ai_ratio, args.seed, args.poll, args.timeout)
+            fmt = lambda p: f"{p['p50']:.0f}/{p['p95']:.0f}/{p['p99']:.0f}"
+            print(f"{r.sessions:>8}{r.requests:>6}{r.errors:>5}{r.throughput_rps:>8.1f}"
+                  f"{fmt(r.latency_ms[SUBMIT]):>26}{fmt(r.latency_ms[SUBMIT_AI]):>26}"
+                  f"{r.memory_kb_per_session:>12.0f}{r.peak_memory_kb:>10.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
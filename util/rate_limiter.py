@@ -0,0 +1,179 @@
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from typing import Callable, Hashable, Optional, Union
+
+from pydantic import BaseModel
+
+# Lower value = served first. Interactive clicks should beat background/speculative work.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+# Rough size of one ai_worker3 response (~53 JSON rows); reserved up front with the prompt.
+DEFAULT_COMPLETION_TOKENS = 6000
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English/JSON text; good enough for budgeting.
+    return max(1, math.ceil(len(text) / 4))
+
+
+class SimulatedClock:
+    """Deterministic clock for tests: sleep() advances time() instead of blocking."""
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+        self._lock = threading.Lock()
+
+    def time(self) -> float:
+        with self._lock:
+            return self.now
+
+    def sleep(self, seconds: float) -> None:
+        with self._lock:
+            self.now += max(0.0, seconds)
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, refill_per_second: float, now: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.level = capacity
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.refill_per_second)
+        self.updated = now
+
+    def seconds_until(self, amount: float, now: float) -> float:
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return 0.0 if missing <= 0 else missing / self.refill_per_second
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+
+# Snapshot of scheduler metrics.
+class SchedulerMetrics(BaseModel):
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    granted: int = 0
+    tokens_granted: int = 0
+    total_wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+
+    @property
+    def mean_wait_seconds(self) -> float:
+        return self.total_wait_seconds / self.granted if self.granted else 0.0
+
+
+class RequestScheduler:
+    """Process-wide requests-per-minute / tokens-per-minute limiter for model calls.
+
+    Callers queue with a priority (lower first, FIFO within a priority); only the head of
+    the queue may take from the buckets, so a large request is not starved by small ones.
+    The priority may be a callable, evaluated when the request is queued; a caller that
+    queues with a ``key`` can also have its priority raised while it waits.
+    ``clock``/``sleep`` can be swapped for a SimulatedClock in tests.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Optional[Callable[[float], None]] = None):
+        self._clock = clock
+        self._sleep = sleep
+        now = clock()
+        self._requests = TokenBucket(requests_per_minute, requests_per_minute / 60.0, now)
+        self._tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0, now)
+        self._cond = threading.Condition()
+        self._queue: list[list[int]] = []
+        self._waiting: dict[Hashable, list[int]] = {}
+        self._seq = itertools.count()
+        self._metrics = SchedulerMetrics()
+
+    def acquire(self, tokens: int, priority: Union[int, Callable[[], int]] = PRIORITY_INTERACTIVE,
+                key: Optional[Hashable] = None) -> float:
+        """Block until a request of ``tokens`` may be sent; returns the seconds waited."""
+        with self._cond:
+            # Decided under the lock, so a concurrent reprioritize either sees the ticket or
+            # happened before this call and is reflected in priority().
+            # [priority, seq]: a list so reprioritize can change the priority in place.
+            ticket = [priority() if callable(priority) else priority, next(self._seq)]
+            started = self._clock()
+            heapq.heappush(self._queue, ticket)
+            if key is not None:
+                self._waiting[key] = ticket
+            self._metrics.queue_depth = len(self._queue)
+            self._metrics.max_queue_depth = max(self._metrics.max_queue_depth, len(self._queue))
+            try:
+                while True:
+                    if self._queue[0] is not ticket:
+                        self._cond.wait()
+                        continue
+                    now = self._clock()
+                    wait = max(self._requests.seconds_until(1, now), self._tokens.seconds_until(tokens, now))
+                    if wait <= 0:
+                        break
+                    self._wait(wait)
+                self._requests.take(1, now)
+                self._tokens.take(tokens, now)
+            finally:
+                if key is not None:
+                    self._waiting.pop(key, None)
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                self._metrics.queue_depth = len(self._queue)
+                self._cond.notify_all()
+            waited = self._clock() - started
+            self._metrics.granted += 1
+            self._metrics.tokens_granted += tokens
+            self._metrics.total_wait_seconds += waited
+            self._metrics.max_wait_seconds = max(self._metrics.max_wait_seconds, waited)
+            return waited
+
+    def reprioritize(self, key: Hashable, priority: int) -> bool:
+        """Raise the priority of the request queued under ``key``; False if none is waiting."""
+        with self._cond:
+            ticket = self._waiting.get(key)
+            if ticket is None or ticket[0] <= priority:
+                return False
+            ticket[0] = priority
+            heapq.heapify(self._queue)
+            self._cond.notify_all()
+            return True
+
+    def _wait(self, seconds: float) -> None:
+        # Called with the lock held, as the queue head waiting for the buckets to refill.
+        if self._sleep is None:
+            self._cond.wait(seconds)
+            return
+        self._cond.release()
+        try:
+            self._sleep(seconds)
+        finally:
+            self._cond.acquire()
+
+    def metrics(self) -> SchedulerMetrics:
+        with self._cond:
+            return self._metrics.model_copy()
+
+
+_scheduler: Optional[RequestScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> RequestScheduler:
+    # Shared by every session in the process; budgets come from the environment.
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RequestScheduler(
+                requests_per_minute=float(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "60")),
+                tokens_per_minute=float(os.getenv("OPENAI_TOKENS_PER_MINUTE", "200000")),
+            )
+        return _scheduler